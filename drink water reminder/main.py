@@ -57,17 +57,42 @@ water-reminder/
 '''
 # Import libraries we need for our water reminder bot
 import os  # To read environment variables (secret settings)
-import time  # To add delays and pauses
+import atexit  # To clean up when the program exits
+import json  # To read the updates Telegram pushes to our webhook
+import hmac  # To check the webhook secret safely
+import time  # To add delays and pauses, and to get the current time
+import random  # To pick a random reminder message
 import requests  # To send messages to Telegram servers
-import schedule  # To schedule reminders at specific times
-from datetime import datetime  # To get current time
-import threading  # For running multiple tasks (not used in this simple version)
+from requests.adapters import HTTPAdapter  # To control how connections are reused
+import threading  # For listening to commands while reminders keep running
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # For our webhook
 
 # 📝 STEP 1: Get our secret settings from environment variables
 # These are stored securely on the hosting platform, not in our code
 BOT_TOKEN = os.environ.get('BOT_TOKEN')  # Our bot's secret password
 CHAT_ID = os.environ.get('CHAT_ID')  # Our personal chat ID number
 REMINDER_INTERVAL = int(os.environ.get('REMINDER_INTERVAL', 60))  # How often to remind (default: 60 minutes)
+# Where Telegram's servers live - change this to use a proxy closer to your host
+TELEGRAM_API_BASE = os.environ.get('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+SEND_ATTEMPTS = 5  # How many times to try sending a message before giving up
+# How long to wait (in seconds) to connect to Telegram, and then for its answer
+# Without a limit, one slow request could freeze the bot for minutes
+SEND_TIMEOUT = (3.05, 10)
+# Optional: our public web address (e.g. https://my-app.up.railway.app/hook)
+# If set, Telegram pushes commands to us instead of us asking for them
+WEBHOOK_URL = os.environ.get('WEBHOOK_URL')
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET')  # Optional password Telegram sends with every update
+PORT = int(os.environ.get('PORT', 8080))  # Which port our webhook listens on (Railway sets this)
+
+# 💬 Different reminder messages (you can add more!)
+# A tuple is a list that never changes - it's built once when the program starts
+REMINDER_MESSAGES = (
+    "💧 Time to drink water! Stay hydrated! 🚰",
+    "🌊 Hydration check! Drink a glass of water now! 💙",
+    "💦 Your body needs water! Take a sip! 🥤",
+    "🚰 Water break time! Keep yourself healthy! 💧",
+    "💙 Reminder: Drink water for better health! 🌊",
+)
 
 
 class WaterReminderBot:
@@ -84,58 +109,96 @@ class WaterReminderBot:
         self.bot_token = bot_token  # Store the bot's secret password
         self.chat_id = chat_id  # Store our chat ID (where to send messages)
         # Create the URL we'll use to talk to Telegram servers
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.base_url = f"{TELEGRAM_API_BASE}/bot{bot_token}"
+        # The web address where we send our messages (it never changes, so build it once)
+        self._send_url = f"{self.base_url}/sendMessage"
+        # The parts of every message that never change
+        self._base_payload = {
+            'chat_id': chat_id,  # Where to send (our phone)
+            'parse_mode': 'HTML'  # Allow bold/italic text formatting
+        }
+        # One session for all requests - it keeps the connection to Telegram open,
+        # so we don't have to connect (and do the secure handshake) for every message
+        self.session = requests.Session()
+        # We only ever talk to one server: one connection for sending messages,
+        # and one that waits for commands
+        # max_retries=0: we handle retries ourselves in send_message
+        # (mounted for http:// too, e.g. a self-hosted Bot API server in TELEGRAM_API_BASE)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Close the connection nicely when the program exits
+        atexit.register(self.session.close)
+        # Remember which Telegram updates (incoming messages) we've already handled
+        self.offset = 0
+        # When True, the bot skips reminders (the user sent 'stop')
+        self.paused = False
 
     def send_message(self, message):
         """
         This function sends a message to our phone via Telegram
         Think of it as our bot's mouth - how it talks to us
         """
-        # Create the web address where we send our message
-        url = f"{self.base_url}/sendMessage"
-
-        # Prepare the message data to send
-        data = {
-            'chat_id': self.chat_id,  # Where to send (our phone)
-            'text': message,  # What to send (the reminder text)
-            'parse_mode': 'HTML'  # Allow bold/italic text formatting
-        }
-
-        # Try to send the message (with error handling)
-        try:
-            # Send HTTP request to Telegram servers
-            response = requests.post(url, data=data)
-
-            # Check if message was sent successfully
-            if response.status_code == 200:
-                print(f"✅ Message sent: {message}")
-            else:
-                print(f"❌ Failed to send message: {response.text}")
-
-        except Exception as e:
-            # If something goes wrong, print the error
-            print(f"❌ Error sending message: {e}")
+        # Prepare the message data to send: the fixed parts plus our text
+        data = self._base_payload.copy()
+        data['text'] = message  # What to send (the reminder text)
+
+        # Try to send the message - a few times if Telegram is having trouble
+        for attempt in range(SEND_ATTEMPTS):
+            # Wait a bit longer after every failure (1s, 2s, 4s, ... up to 30s),
+            # plus a random fraction so we don't retry at exactly the same moment
+            wait = min(30, 2 ** attempt) + random.random()
+
+            try:
+                # Send HTTP request to Telegram servers (as JSON, which Telegram understands)
+                response = self.session.post(self._send_url, json=data, timeout=SEND_TIMEOUT)
+
+                # Check if message was sent successfully
+                if response.status_code == 200:
+                    print(f"✅ Message sent: {message}")
+                    return
+
+                if response.status_code == 429:
+                    # We're sending too fast - Telegram tells us how long to wait
+                    wait = response.json().get('parameters', {}).get('retry_after', wait)
+                elif response.status_code < 500:
+                    # Other errors (like a wrong chat ID) won't fix themselves - give up
+                    print(f"❌ Failed to send message: {response.text}")
+                    return
+
+                print(f"⚠️ Telegram is busy ({response.status_code}), will try again")
+
+            except requests.ReadTimeout:
+                # Telegram got our message but took too long to answer - it may already
+                # have been delivered, so don't send it again (no duplicate reminders)
+                print("⌛ Telegram took too long to answer, not sending the message again")
+                return
+
+            except requests.ConnectionError as e:
+                # Network trouble (like no internet, or connecting took too long)
+                # - the message never left, so try again shortly
+                print(f"❌ Error sending message: {e}, will try again")
+
+            except Exception as e:
+                # Other errors (like a badly written TELEGRAM_API_BASE) won't fix themselves - give up
+                print(f"❌ Error sending message: {e}")
+                return
+
+            # Don't wait after the last attempt - we're giving up anyway
+            if attempt < SEND_ATTEMPTS - 1:
+                time.sleep(wait)
+
+        print(f"❌ Gave up sending message after {SEND_ATTEMPTS} attempts")
 
     def send_water_reminder(self):
         """
         This function creates and sends a water drinking reminder
         It picks a random message to keep things interesting
         """
-        # List of different reminder messages (you can add more!)
-        messages = [
-            "💧 Time to drink water! Stay hydrated! 🚰",
-            "🌊 Hydration check! Drink a glass of water now! 💙",
-            "💦 Your body needs water! Take a sip! 🥤",
-            "🚰 Water break time! Keep yourself healthy! 💧",
-            "💙 Reminder: Drink water for better health! 🌊"
-        ]
-
-        # Import random module to pick a random message
-        import random
-        message = random.choice(messages)  # Pick one message randomly
+        message = random.choice(REMINDER_MESSAGES)  # Pick one message randomly
 
         # Get current time and format it nicely (like "14:30")
-        current_time = datetime.now().strftime("%H:%M")
+        current_time = time.strftime("%H:%M", time.localtime())
 
         # Create the final message with time and reminder
         full_message = f"⏰ <b>{current_time}</b>\n{message}"
@@ -152,9 +215,8 @@ class WaterReminderBot:
         print(f"🚀 Water reminder bot started!")
         print(f"⏱️ Reminder interval: {REMINDER_INTERVAL} minutes")
 
-        # 📅 SCHEDULE SETUP: Tell the bot when to send reminders
-        # This line says: "Every X minutes, run the send_water_reminder function"
-        schedule.every(REMINDER_INTERVAL).minutes.do(self.send_water_reminder)
+        # 📅 SCHEDULE SETUP: Work out how many seconds go between reminders
+        interval_s = REMINDER_INTERVAL * 60
 
         # Send a welcome message to our phone
         welcome_message = (
@@ -166,20 +228,193 @@ class WaterReminderBot:
         )
         self.send_message(welcome_message)
 
+        # 👂 Listen for 'stop'/'start' commands in the background
+        if WEBHOOK_URL:
+            # Telegram will push commands to our web address
+            self.start_webhook()
+        else:
+            # We ask Telegram for commands ourselves
+            # daemon=True means this helper stops automatically when the main program stops
+            threading.Thread(target=self.handle_commands, daemon=True).start()
+
+        # ⏰ The first reminder is due one interval from now
+        # time.monotonic() is a clock that never jumps backwards (unlike the wall clock)
+        next_run = time.monotonic() + interval_s
+
         # 🔄 MAIN LOOP: Keep the bot running forever
-        # This is like the bot's heartbeat - it never stops checking for scheduled tasks
+        # The bot sleeps until the next reminder is due instead of waking up every second
         while True:
-            # Check if any scheduled reminders are due
-            schedule.run_pending()
-            # Wait 1 second before checking again (saves computer resources)
-            time.sleep(1)
+            # Sleep only for the time that is left (sending a message takes time too)
+            sleep_for = max(0, next_run - time.monotonic())
+            time.sleep(sleep_for)
+
+            # Time is up - send the reminder (unless the user paused us)
+            if not self.paused:
+                self.send_water_reminder()
+
+            # Plan the next reminder exactly one interval after this one,
+            # so small delays never add up over the day.
+            # If the bot was frozen for a while (e.g. the server paused it), several
+            # reminders may have been missed - skip them instead of sending them
+            # all at once, so you only get one reminder
+            missed = int((time.monotonic() - next_run) // interval_s)
+            next_run += (max(0, missed) + 1) * interval_s
+
+    def handle_update(self, update):
+        """
+        This function looks at one update (incoming message) from Telegram
+        It pauses or resumes reminders, and returns the reply to send back
+        (or None if the message wasn't a command for us)
+        """
+        # Only listen to messages from our own chat
+        message = update.get('message')
+        if not isinstance(message, dict):
+            return None
+        chat = message.get('chat')
+        if not isinstance(chat, dict) or str(chat.get('id')) != str(self.chat_id):
+            return None
+
+        # Accept 'stop', '/stop' and '/stop@our_bot' (any upper/lower case)
+        # - Telegram adds '@our_bot' when a command is tapped in a group chat
+        command = str(message.get('text') or '').strip().lower().lstrip('/')
+        command = command.split('@', 1)[0]
+        if command == 'stop':
+            self.paused = True
+            return "⏸️ Reminders paused. Send 'start' to resume."
+        if command == 'start':
+            self.paused = False
+            return "▶️ Reminders resumed!"
+        return None
+
+    def start_webhook(self):
+        """
+        This function tells Telegram our web address and starts a small web server
+        Telegram then sends us each new message as soon as it arrives,
+        so the bot does nothing at all until you actually send a command
+        """
+        # Tell Telegram where to send updates
+        data = {'url': WEBHOOK_URL, 'allowed_updates': ['message']}
+        if WEBHOOK_SECRET:
+            data['secret_token'] = WEBHOOK_SECRET
+        try:
+            response = self.session.post(f"{self.base_url}/setWebhook", json=data, timeout=SEND_TIMEOUT)
+            if response.status_code != 200:
+                print(f"❌ Failed to set webhook: {response.text}")
+        except Exception as e:
+            print(f"❌ Error setting webhook: {e}")
+
+        # Start the web server in the background
+        server = ThreadingHTTPServer(('', PORT), WebhookHandler)
+        server.bot = self  # Let the handler find our bot
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"🌐 Webhook listening on port {PORT}")
 
     def handle_commands(self):
         """
-        Future feature: This could handle user commands like /start, /stop
-        For now, it's just a placeholder for more advanced features
+        This function listens for commands from our phone ('stop' and 'start')
+        It uses "long polling": we ask Telegram for new messages, and Telegram
+        keeps the request open until a message arrives (or 50 seconds pass)
+        """
+        url = f"{self.base_url}/getUpdates"
+
+        # Telegram won't answer getUpdates while a webhook is set, so remove any old one
+        try:
+            self.session.post(f"{self.base_url}/deleteWebhook", timeout=SEND_TIMEOUT)
+        except Exception as e:
+            print(f"❌ Error removing webhook: {e}")
+
+        # Keep listening forever
+        while True:
+            try:
+                # Ask for updates we haven't seen yet, waiting up to 50 seconds
+                # (we give Telegram 60 seconds to answer, a bit longer than that)
+                params = {'offset': self.offset, 'timeout': 50}
+                response = self.session.get(url, params=params, timeout=(SEND_TIMEOUT[0], 60))
+                body = response.json()
+
+                # Telegram answered with an error (like 409 Conflict when another copy
+                # of the bot is polling) - wait before asking again, never retry straight away
+                if not response.ok or not body.get('ok'):
+                    print(f"❌ Failed to get updates: {body.get('description', response.status_code)}")
+                    # On 429 Telegram tells us how long to wait, otherwise wait 5 seconds
+                    time.sleep(body.get('parameters', {}).get('retry_after', 5))
+                    continue
+
+                updates = body.get('result', [])
+
+            except Exception as e:
+                # If something goes wrong, wait a bit before trying again
+                print(f"❌ Error getting updates: {e}")
+                time.sleep(5)
+                continue
+
+            for update in updates:
+                # Tell Telegram we've handled this update, so we don't get it again
+                self.offset = update['update_id'] + 1
+
+                # Pause/resume and let the user know
+                reply = self.handle_update(update)
+                if reply:
+                    self.send_message(reply)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """
+    This class answers the web requests Telegram sends to our webhook
+    Each request contains one update (like a 'stop' message from our phone)
+    """
+
+    def do_POST(self):
+        """
+        This function runs every time Telegram sends us an update
+        """
+        # If we set a secret, make sure the request really comes from Telegram
+        # (compare_digest takes the same time whether the guess is close or not)
+        token = self.headers.get('X-Telegram-Bot-Api-Secret-Token') or ''
+        if WEBHOOK_SECRET and not hmac.compare_digest(token.encode(), WEBHOOK_SECRET.encode()):
+            self.send_response(403)
+            self.end_headers()
+            return
+
+        # Read and decode the update
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            # A negative length would make us wait forever for the body
+            if length < 0:
+                raise ValueError("negative Content-Length")
+            update = json.loads(self.rfile.read(length))
+            # A Telegram update is always a JSON object ({...})
+            if not isinstance(update, dict):
+                raise ValueError("update is not a JSON object")
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        # Pause/resume
+        bot = self.server.bot
+        reply = bot.handle_update(update)
+
+        # Tell Telegram we got it (otherwise it sends the update again)
+        self.send_response(200)
+        if reply:
+            # Trick: our answer to Telegram can itself be a sendMessage call,
+            # so we let the user know without making a separate request
+            data = bot._base_payload.copy()
+            data['method'] = 'sendMessage'
+            data['text'] = reply
+            body = json.dumps(data).encode()
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        """
+        Keep the logs quiet - we don't need a line for every web request
         """
-        # This is a simple version - for full command handling, you'd need webhooks
         pass
 
 
@@ -195,6 +430,12 @@ def main():
         print("💡 Make sure you've set up these variables in Railway/Heroku")
         return  # Stop the program if settings are missing
 
+    # The reminder interval must be at least 1 minute (0 or less makes no sense)
+    if REMINDER_INTERVAL < 1:
+        print(f"❌ Error: REMINDER_INTERVAL must be at least 1 minute (got {REMINDER_INTERVAL})!")
+        print("💡 Set REMINDER_INTERVAL to a whole number of minutes, like 60")
+        return  # Stop the program if the interval is invalid
+
     # 🤖 CREATE THE BOT: Make a new WaterReminderBot with our settings
     bot = WaterReminderBot(BOT_TOKEN, CHAT_ID)
 
@@ -222,15 +463,18 @@ if __name__ == "__main__":
 This program works like this:
 1. Gets secret settings (bot token, chat ID, reminder interval)
 2. Creates a WaterReminderBot object with those settings
-3. Sets up a schedule to send reminders every X minutes
-4. Runs forever, checking every second if it's time to send a reminder
+3. Works out how long to wait between reminders (every X minutes)
+4. Runs forever, sleeping until it's time to send the next reminder
 5. When it's time, picks a random water reminder message
 6. Sends that message to your phone via Telegram
+7. Meanwhile, listens for 'stop'/'start' messages to pause or resume
+   (by asking Telegram, or via a webhook if WEBHOOK_URL is set)
 
 Key concepts used:
 - Classes: Like blueprints for creating objects (our bot)
 - Functions: Reusable pieces of code that do specific tasks
 - Loops: Code that repeats (while True = repeat forever)
+- Threads: Running two things at once (reminders + listening for commands)
 - Error handling: try/except blocks to handle problems gracefully
 - Environment variables: Secure way to store passwords and settings
 